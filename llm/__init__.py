@@ -19,7 +19,9 @@ from .models import (
 from .embeddings import Collection
 from .templates import Template
 from .plugins import pm, load_plugins
+from .utils import ensure_dir
 import click
+from functools import lru_cache
 from typing import Dict, List, Optional
 import json
 import os
@@ -248,10 +250,27 @@ def get_key(
 
 def load_keys():
     path = user_dir() / "keys.json"
-    if path.exists():
-        return json.loads(path.read_text())
-    else:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
         return {}
+    return dict(_load_keys_cached(path, stat.st_mtime_ns, stat.st_size))
+
+
+@lru_cache(maxsize=4)
+def _load_keys_cached(path, mtime_ns, size):
+    # mtime_ns and size are only here to invalidate the cache on changes
+    return json.loads(path.read_text())
+
+
+def clear_keys_cache():
+    """
+    Forget previously loaded keys.json contents, for use after writing to it.
+
+    Changes are usually detected from the file's mtime and size, but a
+    same-size rewrite within the filesystem's timestamp resolution is not.
+    """
+    _load_keys_cached.cache_clear()
 
 
 def user_dir():
@@ -260,7 +279,7 @@ def user_dir():
         path = pathlib.Path(llm_user_path)
     else:
         path = pathlib.Path(click.get_app_dir("io.datasette.llm"))
-    path.mkdir(exist_ok=True, parents=True)
+    ensure_dir(path)
     return path
 
 
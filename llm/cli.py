@@ -1,9 +1,13 @@
 import asyncio
+import atexit
 import click
 from click_default_group import DefaultGroup
 from dataclasses import asdict
+from functools import lru_cache
+import hashlib
 import io
 import json
+import os
 from llm import (
     Attachment,
     AsyncResponse,
@@ -12,6 +16,7 @@ from llm import (
     Response,
     Template,
     UnknownModelError,
+    clear_keys_cache,
     encode,
     get_async_model,
     get_default_model,
@@ -24,6 +29,7 @@ from llm import (
     get_model,
     get_model_aliases,
     get_models_with_aliases,
+    load_keys,
     user_dir,
     set_alias,
     set_default_model,
@@ -38,6 +44,7 @@ from .utils import (
     mimetype_from_string,
     token_usage_string,
     extract_fenced_code_block,
+    ensure_dir,
 )
 import base64
 import httpx
@@ -50,9 +57,9 @@ import sqlite_utils
 from sqlite_utils.utils import rows_from_file, Format
 import sys
 import textwrap
-from typing import cast, Optional, Iterable, Union, Tuple
+import time
+from typing import cast, Dict, Optional, Iterable, Union, Tuple
 import warnings
-import yaml
 
 warnings.simplefilter("ignore", ResourceWarning)
 
@@ -122,6 +129,52 @@ def _validate_metadata_json(ctx, param, value):
         raise click.BadParameter("Metadata must be valid JSON")
 
 
+class _StreamWriter:
+    """
+    Write streamed response chunks to stdout in small batches.
+
+    Output is flushed once flush_size characters are pending or
+    flush_interval seconds have passed since the last flush, rather than
+    once per chunk. Use as a context manager so anything still pending is
+    flushed even if the stream raises part way through.
+
+    The interval is only checked when a chunk arrives, so if the model
+    pauses just after a flush, up to flush_size - 1 characters stay
+    hidden until the next chunk or the end of the stream.
+    """
+
+    def __init__(self, flush_size=64, flush_interval=0.05):
+        self.stream = sys.stdout
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.pending = []
+        self.pending_size = 0
+        self.last_flush = time.monotonic()
+
+    def write(self, chunk):
+        self.pending.append(chunk)
+        self.pending_size += len(chunk)
+        if (
+            self.pending_size >= self.flush_size
+            or time.monotonic() - self.last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.stream.write("".join(self.pending))
+            self.pending.clear()
+            self.pending_size = 0
+        self.stream.flush()
+        self.last_flush = time.monotonic()
+
+
 @click.group(
     cls=DefaultGroup,
     default="prompt",
@@ -328,6 +381,8 @@ def prompt(
             to_save["extract"] = True
         if extract_last:
             to_save["extract_last"] = True
+        import yaml
+
         path.write_text(
             yaml.dump(
                 to_save,
@@ -426,9 +481,9 @@ def prompt(
                         system=system,
                         **validated_options,
                     )
-                    async for chunk in response:
-                        print(chunk, end="")
-                        sys.stdout.flush()
+                    with _StreamWriter() as writer:
+                        async for chunk in response:
+                            writer.write(chunk)
                     print("")
                 else:
                     response = prompt_method(
@@ -454,9 +509,9 @@ def prompt(
                 **validated_options,
             )
             if should_stream:
-                for chunk in response:
-                    print(chunk, end="")
-                    sys.stdout.flush()
+                with _StreamWriter() as writer:
+                    for chunk in response:
+                        writer.write(chunk)
                 print("")
             else:
                 text = response.text()
@@ -486,10 +541,7 @@ def prompt(
 
     # Log to the database
     if (logs_on() or log) and not no_log:
-        log_path = logs_db_path()
-        (log_path.parent).mkdir(parents=True, exist_ok=True)
-        db = sqlite_utils.Database(log_path)
-        migrate(db)
+        db = _get_logs_db()
         response.log_to_db(db)
 
 
@@ -549,10 +601,7 @@ def chat(
     else:
         readline.parse_and_bind("bind -x '\\e[D: backward-char'")
         readline.parse_and_bind("bind -x '\\e[C: forward-char'")
-    log_path = logs_db_path()
-    (log_path.parent).mkdir(parents=True, exist_ok=True)
-    db = sqlite_utils.Database(log_path)
-    migrate(db)
+    db = _get_logs_db()
 
     conversation = None
     if conversation_id or _continue:
@@ -644,16 +693,15 @@ def chat(
         response = conversation.prompt(prompt, system=system, **validated_options)
         # System prompt only sent for the first message:
         system = None
-        for chunk in response:
-            print(chunk, end="")
-            sys.stdout.flush()
+        with _StreamWriter() as writer:
+            for chunk in response:
+                writer.write(chunk)
         response.log_to_db(db)
         print("")
 
 
 def load_conversation(conversation_id: Optional[str]) -> Optional[Conversation]:
-    db = sqlite_utils.Database(logs_db_path())
-    migrate(db)
+    db = _get_logs_db()
     if conversation_id is None:
         # Return the most recent conversation, or None if there are none
         matches = list(db["conversations"].rows_where(order_by="id desc", limit=1))
@@ -692,7 +740,7 @@ def keys_list():
     if not path.exists():
         click.echo("No keys found")
         return
-    keys = json.loads(path.read_text())
+    keys = load_keys()
     for key in sorted(keys.keys()):
         if key != "// Note":
             click.echo(key)
@@ -718,7 +766,7 @@ def keys_get(name):
     path = user_dir() / "keys.json"
     if not path.exists():
         raise click.ClickException("No keys found")
-    keys = json.loads(path.read_text())
+    keys = load_keys()
     try:
         click.echo(keys[name])
     except KeyError:
@@ -750,6 +798,7 @@ def keys_set(name, value):
         current = default
     current[name] = value
     path.write_text(json.dumps(current, indent=2) + "\n")
+    clear_keys_cache()
 
 
 @cli.group(
@@ -778,8 +827,7 @@ def logs_status():
         click.echo("Logging is ON for all prompts".format())
     else:
         click.echo("Logging is OFF".format())
-    db = sqlite_utils.Database(path)
-    migrate(db)
+    db = _get_logs_db()
     click.echo("Found log database at {}".format(path))
     click.echo("Number of conversations logged:\t{}".format(db["conversations"].count))
     click.echo("Number of responses logged:\t{}".format(db["responses"].count))
@@ -920,8 +968,11 @@ def logs_list(
     path = pathlib.Path(path or logs_db_path())
     if not path.exists():
         raise click.ClickException("No log database found at {}".format(path))
-    db = sqlite_utils.Database(path)
-    migrate(db)
+    if path == logs_db_path():
+        db = _get_logs_db()
+    else:
+        db = sqlite_utils.Database(path)
+        migrate(db)
 
     if response and not current_conversation and not conversation_id:
         current_conversation = True
@@ -1016,7 +1067,18 @@ def logs_list(
                 {k: v for k, v in attachment.items() if k != "response_id"}
                 for attachment in attachments_by_id.get(row["id"], [])
             ]
-        output = json.dumps(list(rows), indent=2)
+        # Write one row at a time rather than encoding the whole document
+        # as one string, matching the layout of json.dumps(rows, indent=2)
+        if not rows:
+            sys.stdout.write("[]\n")
+            return
+        sys.stdout.write("[\n")
+        for i, row in enumerate(rows):
+            if i:
+                sys.stdout.write(",\n")
+            sys.stdout.write("  " + json.dumps(row, indent=2).replace("\n", "\n  "))
+        sys.stdout.write("\n]\n")
+        return
     elif extract or extract_last:
         # Extract and return first code block
         for row in rows:
@@ -1195,9 +1257,13 @@ def templates():
 def templates_list():
     "List available prompt templates"
     path = template_dir()
+    names = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.name.endswith(".yaml") and entry.is_file():
+                names.append(entry.name[: -len(".yaml")])
     pairs = []
-    for file in path.glob("*.yaml"):
-        name = file.stem
+    for name in names:
         template = load_template(name)
         text = []
         if template.system:
@@ -1213,7 +1279,12 @@ def templates_list():
         return
     else:
         fmt = "{name:<" + str(max_name_len) + "} : {prompt}"
+        # Truncate prompts before formatting, so long ones are not copied
+        # into the full line only to be sliced off again
+        max_prompt_len = shutil.get_terminal_size()[0] - max_name_len - len(" : ")
         for name, prompt in sorted(pairs):
+            if max_prompt_len >= 3:
+                prompt = _truncate_string(prompt, max_prompt_len)
             text = fmt.format(name=name, prompt=prompt)
             click.echo(display_truncated(text))
 
@@ -1300,16 +1371,15 @@ def plugins_list(all):
 
 def display_truncated(text):
     console_width = shutil.get_terminal_size()[0]
-    if len(text) > console_width:
-        return text[: console_width - 3] + "..."
-    else:
-        return text
+    return _truncate_string(text, console_width)
 
 
 @templates.command(name="show")
 @click.argument("name")
 def templates_show(name):
     "Show the specified prompt template"
+    import yaml
+
     template = load_template(name)
     click.echo(
         yaml.dump(
@@ -1893,7 +1963,7 @@ def collections_delete(collection, database):
 
 def template_dir():
     path = user_dir() / "templates"
-    path.mkdir(parents=True, exist_ok=True)
+    ensure_dir(path)
     return path
 
 
@@ -1907,17 +1977,105 @@ def logs_db_path():
     return user_dir() / "logs.db"
 
 
+# Open logs.db connections, keyed by path, reused for the life of the process
+_logs_db_cache: Dict[str, sqlite_utils.Database] = {}
+
+
+def _get_logs_db() -> sqlite_utils.Database:
+    """
+    Return a migrated connection to logs.db, opening it on first use.
+
+    The connection uses WAL journaling with synchronous=NORMAL, so each
+    logged response costs a WAL append rather than a full fsync.
+    """
+    log_path = logs_db_path()
+    key = str(log_path)
+    db = _logs_db_cache.get(key)
+    if db is not None:
+        if log_path.exists():
+            return db
+        # logs.db was deleted since it was opened - drop the stale handle
+        db.conn.close()
+        del _logs_db_cache[key]
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite_utils.Database(log_path)
+    db.conn.execute("PRAGMA journal_mode=WAL")
+    db.conn.execute("PRAGMA synchronous=NORMAL")
+    db.conn.execute("PRAGMA temp_store=MEMORY")
+    migrate(db)
+    _logs_db_cache[key] = db
+    return db
+
+
+@atexit.register
+def _close_logs_dbs():
+    for db in _logs_db_cache.values():
+        db.conn.close()
+    _logs_db_cache.clear()
+
+
+@lru_cache(maxsize=128)
+def _parse_template_file(path_str, mtime_ns, size):
+    """
+    Parse a template YAML file, using a .yaml.json sidecar as a cache.
+
+    The sidecar records the mtime, size and SHA-256 hash of the YAML it was
+    built from and is ignored if any of them no longer match - the hash
+    catches same-size edits on filesystems with coarse timestamps. mtime_ns
+    and size are also part of the lru_cache key, so edits are picked up
+    within a process.
+
+    The sidecar is only written if the parsed YAML survives a round trip
+    through JSON unchanged - YAML allows non-string keys, for example.
+    """
+    path = pathlib.Path(path_str)
+    cache_path = path.with_suffix(".yaml.json")
+    content = path.read_text()
+    sha256 = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    try:
+        cached = json.loads(cache_path.read_text())
+        if (
+            cached["mtime_ns"] == mtime_ns
+            and cached["size"] == size
+            and cached["sha256"] == sha256
+        ):
+            return cached["template"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    import yaml
+
+    try:
+        loaded = yaml.safe_load(content)
+    except yaml.YAMLError as ex:
+        raise click.ClickException("Invalid YAML: {}".format(str(ex)))
+    try:
+        if json.loads(json.dumps(loaded)) == loaded:
+            cache_path.write_text(
+                json.dumps(
+                    {
+                        "mtime_ns": mtime_ns,
+                        "size": size,
+                        "sha256": sha256,
+                        "template": loaded,
+                    }
+                )
+            )
+    except (OSError, TypeError, ValueError):
+        # Read-only directory, or YAML that cannot be represented as JSON
+        pass
+    return loaded
+
+
 def load_template(name):
     path = template_dir() / f"{name}.yaml"
     if not path.exists():
         raise click.ClickException(f"Invalid template: {name}")
-    try:
-        loaded = yaml.safe_load(path.read_text())
-    except yaml.YAMLError as ex:
-        raise click.ClickException("Invalid YAML: {}".format(str(ex)))
+    stat = path.stat()
+    loaded = _parse_template_file(str(path), stat.st_mtime_ns, stat.st_size)
     if isinstance(loaded, str):
         return Template(name=name, prompt=loaded)
-    loaded["name"] = name
+    # Copy, as the parsed dictionary is shared via the lru_cache
+    loaded = dict(loaded, name=name)
     try:
         return Template(**loaded)
     except pydantic.ValidationError as ex:
@@ -1929,9 +2087,7 @@ def load_template(name):
 def get_history(chat_id):
     if chat_id is None:
         return None, []
-    log_path = logs_db_path()
-    db = sqlite_utils.Database(log_path)
-    migrate(db)
+    db = _get_logs_db()
     if chat_id == -1:
         # Return the most recent chat
         last_row = list(db["logs"].rows_where(order_by="-id", limit=1))
@@ -1948,7 +2104,7 @@ def get_history(chat_id):
 def render_errors(errors):
     output = []
     for error in errors:
-        output.append(", ".join(error["loc"]))
+        output.append(", ".join(str(loc) for loc in error["loc"]))
         output.append("  " + error["msg"])
     return "\n".join(output)
 
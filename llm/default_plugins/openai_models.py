@@ -9,7 +9,6 @@ from llm.utils import (
 import click
 import datetime
 import httpx
-import openai
 import os
 
 try:
@@ -23,7 +22,6 @@ except ImportError:
 
 from typing import AsyncGenerator, List, Iterable, Iterator, Optional, Union
 import json
-import yaml
 
 
 @hookimpl
@@ -93,6 +91,8 @@ def register_models(register):
     extra_path = llm.user_dir() / "extra-openai-models.yaml"
     if not extra_path.exists():
         return
+    import yaml
+
     with open(extra_path) as f:
         extra_models = yaml.safe_load(f)
     for extra_model in extra_models:
@@ -186,6 +186,8 @@ class OpenAIEmbeddingModel(EmbeddingModel):
         }
         if self.dimensions:
             kwargs["dimensions"] = self.dimensions
+        import openai
+
         client = openai.OpenAI(api_key=self.get_key())
         results = client.embeddings.create(**kwargs).data
         return ([float(r) for r in result.embedding] for result in results)
@@ -445,6 +447,9 @@ class _Shared:
         )
 
     def get_client(self, async_=False):
+        # openai is slow to import, so only load it once a client is needed
+        import openai
+
         kwargs = {}
         if self.api_base:
             kwargs["base_url"] = self.api_base
@@ -649,7 +654,7 @@ def not_nulls(data) -> dict:
 
 
 def combine_chunks(chunks: List) -> dict:
-    content = ""
+    content_parts = []
     role = None
     finish_reason = None
     # If any of them have log probability, we're going to persist
@@ -670,17 +675,17 @@ def combine_chunks(chunks: List) -> dict:
                 )
 
             if not hasattr(choice, "delta"):
-                content += choice.text
+                content_parts.append(choice.text)
                 continue
             role = choice.delta.role
             if choice.delta.content is not None:
-                content += choice.delta.content
+                content_parts.append(choice.delta.content)
             if choice.finish_reason is not None:
                 finish_reason = choice.finish_reason
 
     # Imitations of the OpenAI API may be missing some of these fields
     combined = {
-        "content": content,
+        "content": "".join(content_parts),
         "role": role,
         "finish_reason": finish_reason,
         "usage": usage,
@@ -237,3 +237,9 @@ def m013_usage(db):
     db["responses"].add_column("input_tokens", int)
     db["responses"].add_column("output_tokens", int)
     db["responses"].add_column("token_details", str)
+
+
+@migration
+def m014_responses_conversation_id_index(db):
+    # Used by --continue, --cid and llm logs --cid
+    db["responses"].create_index(["conversation_id"], if_not_exists=True)
@@ -24,9 +24,11 @@ from .utils import mimetype_from_path, mimetype_from_string, token_usage_string
 from abc import ABC, abstractmethod
 import json
 from pydantic import BaseModel
+from sqlite_utils.db import jsonify_if_needed
 from ulid import ULID
 
 CONVERSATION_NAME_LENGTH = 32
+_WHITESPACE_RE = re.compile(r"\s+")
 
 
 @dataclass
@@ -210,6 +212,7 @@ class _BaseResponse:
         self.model = model
         self.stream = stream
         self._chunks: List[str] = []
+        self._text: Optional[str] = None
         self._done = False
         self.response_json = None
         self.conversation = conversation
@@ -275,20 +278,21 @@ class _BaseResponse:
             self.input_tokens, self.output_tokens, self.token_details
         )
 
+    def _joined_text(self) -> str:
+        # Only call once done: the chunks no longer change, so join them once
+        if self._text is None:
+            self._text = "".join(self._chunks)
+        return self._text
+
     def log_to_db(self, db):
         conversation = self.conversation
         if not conversation:
             conversation = Conversation(model=self.model)
-        db["conversations"].insert(
-            {
-                "id": conversation.id,
-                "name": _conversation_name(
-                    self.prompt.prompt or self.prompt.system or ""
-                ),
-                "model": conversation.model.model_id,
-            },
-            ignore=True,
-        )
+        conversation_row = {
+            "id": conversation.id,
+            "name": _conversation_name(self.prompt.prompt or self.prompt.system or ""),
+            "model": conversation.model.model_id,
+        }
         response_id = str(ULID()).lower()
         response = {
             "id": response_id,
@@ -312,27 +316,50 @@ class _BaseResponse:
                 json.dumps(self.token_details) if self.token_details else None
             ),
         }
-        db["responses"].insert(response)
-        # Persist any attachments - loop through with index
+        # Gather attachment rows first - resolving types may need file or
+        # network access, which should not happen inside the transaction
+        attachment_rows = []
+        prompt_attachment_rows = []
         for index, attachment in enumerate(self.prompt.attachments):
             attachment_id = attachment.id()
-            db["attachments"].insert(
+            attachment_rows.append(
                 {
                     "id": attachment_id,
                     "type": attachment.resolve_type(),
                     "path": attachment.path,
                     "url": attachment.url,
                     "content": attachment.content,
-                },
-                replace=True,
+                }
             )
-            db["prompt_attachments"].insert(
+            prompt_attachment_rows.append(
                 {
                     "response_id": response_id,
                     "attachment_id": attachment_id,
                     "order": index,
-                },
+                }
+            )
+        # Plain parameterized inserts against the already-migrated schema,
+        # skipping sqlite-utils' per-call table introspection - its insert
+        # methods also commit as they go. Everything is written in a single
+        # transaction, so a failure cannot leave a partially logged response.
+        with db.conn:
+            db.execute(
+                _insert_sql("conversations", conversation_row, conflict="ignore"),
+                [jsonify_if_needed(value) for value in conversation_row.values()],
+            )
+            db.execute(
+                _insert_sql("responses", response),
+                [jsonify_if_needed(value) for value in response.values()],
             )
+            if attachment_rows:
+                db.conn.executemany(
+                    _insert_sql("attachments", attachment_rows[0], conflict="replace"),
+                    [list(row.values()) for row in attachment_rows],
+                )
+                db.conn.executemany(
+                    _insert_sql("prompt_attachments", prompt_attachment_rows[0]),
+                    [list(row.values()) for row in prompt_attachment_rows],
+                )
 
 
 class Response(_BaseResponse):
@@ -358,7 +385,7 @@ class Response(_BaseResponse):
 
     def text(self) -> str:
         self._force()
-        return "".join(self._chunks)
+        return self._joined_text()
 
     def text_or_raise(self) -> str:
         return self.text()
@@ -475,11 +502,11 @@ class AsyncResponse(_BaseResponse):
     def text_or_raise(self) -> str:
         if not self._done:
             raise ValueError("Response not yet awaited")
-        return "".join(self._chunks)
+        return self._joined_text()
 
     async def text(self) -> str:
         await self._force()
-        return "".join(self._chunks)
+        return self._joined_text()
 
     async def json(self) -> Optional[Dict[str, Any]]:
         await self._force()
@@ -774,9 +801,29 @@ class EmbeddingModelWithAliases:
     aliases: Set[str]
 
 
+_INSERT_VERBS = {
+    None: "insert",
+    "ignore": "insert or ignore",
+    "replace": "insert or replace",
+}
+
+
+def _insert_sql(table: str, row: Dict[str, Any], conflict: Optional[str] = None) -> str:
+    # The SQL text is the same on every call for a given table, so sqlite3
+    # reuses its cached prepared statement
+    if conflict not in _INSERT_VERBS:
+        raise ValueError("conflict must be 'ignore', 'replace' or None")
+    return "{} into [{}] ({}) values ({})".format(
+        _INSERT_VERBS[conflict],
+        table,
+        ", ".join("[{}]".format(column) for column in row),
+        ", ".join("?" for _ in row),
+    )
+
+
 def _conversation_name(text):
     # Collapse whitespace, including newlines
-    text = re.sub(r"\s+", " ", text)
+    text = _WHITESPACE_RE.sub(" ", text)
     if len(text) <= CONVERSATION_NAME_LENGTH:
         return text
     return text[: CONVERSATION_NAME_LENGTH - 1] + "…"
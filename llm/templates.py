@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pydantic import BaseModel
 import string
 from typing import Optional, Any, Dict, List, Tuple
@@ -43,8 +44,7 @@ class Template(BaseModel):
         if not text:
             return text
         # Confirm all variables in text are provided
-        string_template = string.Template(text)
-        vars = cls.extract_vars(string_template)
+        string_template, vars = _parse_template(text)
         missing = [p for p in vars if p not in params]
         if missing:
             raise cls.MissingVariables(
@@ -58,3 +58,10 @@ class Template(BaseModel):
             match.group("named")
             for match in string_template.pattern.finditer(string_template.template)
         ]
+
+
+@lru_cache(maxsize=256)
+def _parse_template(text: str) -> Tuple[string.Template, Tuple[str, ...]]:
+    # Templates are often interpolated repeatedly, so only scan each once
+    string_template = string.Template(text)
+    return string_template, tuple(Template.extract_vars(string_template))
@@ -1,6 +1,7 @@
 import click
 import httpx
 import json
+import pathlib
 import puremagic
 import re
 import textwrap
@@ -27,35 +28,45 @@ def mimetype_from_path(path) -> Optional[str]:
         return None
 
 
+def ensure_dir(path: pathlib.Path):
+    """
+    Create path and any missing parents if it is not already a directory.
+
+    Checking first costs one stat() for a directory that already exists,
+    where mkdir(exist_ok=True) makes a failed mkdir() call and then a stat().
+    Nothing is cached, so a directory deleted while the process is running
+    is created again on the next call.
+    """
+    if not path.is_dir():
+        path.mkdir(exist_ok=True, parents=True)
+
+
 def dicts_to_table_string(
     headings: List[str], dicts: List[Dict[str, str]]
 ) -> List[str]:
-    max_lengths = [len(h) for h in headings]
+    # Convert each cell to a string exactly once
+    rows = [[str(d.get(h, "")) for h in headings] for d in dicts]
 
     # Compute maximum length for each column
-    for d in dicts:
-        for i, h in enumerate(headings):
-            if h in d and len(str(d[h])) > max_lengths[i]:
-                max_lengths[i] = len(str(d[h]))
+    max_lengths = [len(h) for h in headings]
+    for i, column in enumerate(zip(*rows)):
+        max_lengths[i] = max(max_lengths[i], max(map(len, column)))
 
     # Generate formatted table strings
-    res = []
-    res.append("    ".join(h.ljust(max_lengths[i]) for i, h in enumerate(headings)))
-
-    for d in dicts:
-        row = []
-        for i, h in enumerate(headings):
-            row.append(str(d.get(h, "")).ljust(max_lengths[i]))
-        res.append("    ".join(row))
-
+    res = [
+        "    ".join(cell.ljust(width) for cell, width in zip(row, max_lengths))
+        for row in [headings] + rows
+    ]
     return res
 
 
 def remove_dict_none_values(d):
     """
     Recursively remove keys with value of None or value of a dict that is all values of None
+
+    Dictionaries with nothing to remove are returned unchanged rather than copied.
     """
-    if not isinstance(d, dict):
+    if not isinstance(d, dict) or not _has_none_values(d):
         return d
     new_dict = {}
     for key, value in d.items():
@@ -71,6 +82,21 @@ def remove_dict_none_values(d):
     return new_dict
 
 
+def _has_none_values(d: dict) -> bool:
+    # Would remove_dict_none_values() change anything in this dictionary?
+    for value in d.values():
+        if value is None:
+            return True
+        if isinstance(value, dict):
+            # Empty nested dictionaries are removed too
+            if not value or _has_none_values(value):
+                return True
+        elif isinstance(value, list):
+            if any(isinstance(v, dict) and _has_none_values(v) for v in value):
+                return True
+    return False
+
+
 class _LogResponse(httpx.Response):
     def iter_bytes(self, *args, **kwargs):
         for chunk in super().iter_bytes(*args, **kwargs):
@@ -156,6 +182,21 @@ def token_usage_string(input_tokens, output_tokens, token_details) -> str:
     return ", ".join(bits)
 
 
+# Regex pattern to match fenced code blocks
+# - ^ or \n ensures that the fence is at the start of a line
+# - (`{3,}) captures the opening backticks (at least three)
+# - (\w+)? optionally captures the language tag
+# - \n matches the newline after the opening fence
+# - (.*?) non-greedy match for the code block content
+# - (?P=fence) ensures that the closing fence has the same number of backticks
+# - [ ]* allows for optional spaces between the closing fence and newline
+# - (?=\n|$) ensures that the closing fence is followed by a newline or end of string
+_FENCED_CODE_BLOCK_RE = re.compile(
+    r"""(?m)^(?P<fence>`{3,})(?P<lang>\w+)?\n(?P<code>.*?)^(?P=fence)[ ]*(?=\n|$)""",
+    re.DOTALL,
+)
+
+
 def extract_fenced_code_block(text: str, last: bool = False) -> Optional[str]:
     """
     Extracts and returns Markdown fenced code block found in the given text.
@@ -174,21 +215,13 @@ def extract_fenced_code_block(text: str, last: bool = False) -> Optional[str]:
     Returns:
         Optional[str]: The content of the fenced code block, or None if not found.
     """
-    # Regex pattern to match fenced code blocks
-    # - ^ or \n ensures that the fence is at the start of a line
-    # - (`{3,}) captures the opening backticks (at least three)
-    # - (\w+)? optionally captures the language tag
-    # - \n matches the newline after the opening fence
-    # - (.*?) non-greedy match for the code block content
-    # - (?P=fence) ensures that the closing fence has the same number of backticks
-    # - [ ]* allows for optional spaces between the closing fence and newline
-    # - (?=\n|$) ensures that the closing fence is followed by a newline or end of string
-    pattern = re.compile(
-        r"""(?m)^(?P<fence>`{3,})(?P<lang>\w+)?\n(?P<code>.*?)^(?P=fence)[ ]*(?=\n|$)""",
-        re.DOTALL,
-    )
-    matches = list(pattern.finditer(text))
-    if matches:
-        match = matches[-1] if last else matches[0]
+    if last:
+        match = None
+        for match in _FENCED_CODE_BLOCK_RE.finditer(text):
+            pass
+    else:
+        # No need to scan past the first match
+        match = _FENCED_CODE_BLOCK_RE.search(text)
+    if match:
         return match.group("code")
     return None
@@ -2,7 +2,10 @@ from click.testing import CliRunner
 from unittest.mock import ANY
 import llm
 from llm import cli
+from llm.migrations import migrate
 import pytest
+import sqlite3
+import sqlite_utils
 
 TINY_PNG = (
     b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\xa6\x00\x00\x01\x1a"
@@ -57,3 +60,43 @@ def test_prompt_attachment(mock_model, logs_db, attachment_type, attachment_cont
     prompt_attachment = list(logs_db["prompt_attachments"].rows)[0]
     assert prompt_attachment["attachment_id"] == attachment["id"]
     assert prompt_attachment["response_id"] == response["id"]
+
+
+def test_prompt_multiple_attachments(mock_model, logs_db, tmpdir):
+    png_path = tmpdir / "image.png"
+    png_path.write_binary(TINY_PNG)
+    wav_path = tmpdir / "audio.wav"
+    wav_path.write_binary(TINY_WAV)
+    runner = CliRunner()
+    mock_model.enqueue(["a box and a beep"])
+    result = runner.invoke(
+        cli.cli,
+        ["prompt", "-m", "mock", "describe", "-a", str(png_path), "-a", str(wav_path)],
+        catch_exceptions=False,
+    )
+    assert result.exit_code == 0, result.output
+    response = list(logs_db["responses"].rows)[0]
+    attachments = {row["id"]: row for row in logs_db["attachments"].rows}
+    assert {row["type"] for row in attachments.values()} == {"image/png", "audio/wav"}
+    prompt_attachments = list(
+        logs_db["prompt_attachments"].rows_where(order_by='"order"')
+    )
+    assert [row["order"] for row in prompt_attachments] == [0, 1]
+    assert [
+        attachments[row["attachment_id"]]["path"] for row in prompt_attachments
+    ] == [str(png_path), str(wav_path)]
+    assert all(row["response_id"] == response["id"] for row in prompt_attachments)
+
+
+def test_log_to_db_is_atomic(mock_model):
+    db = sqlite_utils.Database(memory=True)
+    migrate(db)
+    attachment = llm.Attachment(type="image/png", content=TINY_PNG)
+    mock_model.enqueue(["two boxes"])
+    # The same attachment twice violates the prompt_attachments primary key
+    response = mock_model.prompt("describe", attachments=[attachment, attachment])
+    response.text()
+    with pytest.raises(sqlite3.IntegrityError):
+        response.log_to_db(db)
+    for table in ("conversations", "responses", "attachments", "prompt_attachments"):
+        assert db[table].count == 0
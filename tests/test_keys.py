@@ -1,5 +1,6 @@
 from click.testing import CliRunner
 import json
+import llm
 from llm.cli import cli
 import pathlib
 import pytest
@@ -52,6 +53,19 @@ def test_keys_get(monkeypatch, tmpdir):
     assert result2.output.strip() == "fx"
 
 
+def test_load_keys_sees_keys_set(monkeypatch, tmpdir):
+    monkeypatch.setenv("LLM_USER_PATH", str(tmpdir / "user/keys"))
+    runner = CliRunner()
+    assert llm.load_keys() == {}
+    result = runner.invoke(cli, ["keys", "set", "openai"], input="one")
+    assert result.exit_code == 0
+    assert llm.load_keys()["openai"] == "one"
+    # Same length value, so only the cache_clear() in keys set can catch it
+    result = runner.invoke(cli, ["keys", "set", "openai"], input="two")
+    assert result.exit_code == 0
+    assert llm.load_keys()["openai"] == "two"
+
+
 @pytest.mark.parametrize("args", (["keys", "list"], ["keys"]))
 def test_keys_list(monkeypatch, tmpdir, args):
     user_path = str(tmpdir / "user/keys")
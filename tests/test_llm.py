@@ -9,6 +9,7 @@ import os
 import pathlib
 import pytest
 import re
+import sqlite3
 import sqlite_utils
 import sys
 from ulid import ULID
@@ -113,6 +114,28 @@ def test_logs_json(n, log_path):
     assert len(logs) == expected_length
 
 
+def test_logs_json_non_ascii_with_ascii_stdout(user_path):
+    db = sqlite_utils.Database(str(user_path / "logs.db"))
+    migrate(db)
+    db["responses"].insert(
+        {
+            "id": str(ULID()).lower(),
+            "prompt": "h\u00e9llo \U0001f600",
+            "response": "r\u00e9ponse",
+            "model": "davinci",
+            "datetime_utc": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "conversation_id": "abc123",
+        }
+    )
+    runner = CliRunner(charset="ascii")
+    result = runner.invoke(cli, ["logs", "--json"], catch_exceptions=False)
+    assert result.exit_code == 0
+    # Non-ASCII characters are escaped, matching json.dumps(rows, indent=2)
+    logs = json.loads(result.output)
+    assert logs[0]["prompt"] == "h\u00e9llo \U0001f600"
+    assert result.output == json.dumps(logs, indent=2) + "\n"
+
+
 @pytest.mark.parametrize(
     "args", (["-r"], ["--response"], ["list", "-r"], ["list", "--response"])
 )
@@ -256,6 +279,28 @@ def test_llm_prompt_creates_log_database(mocked_openai_chat, tmpdir, monkeypatch
     assert sqlite_utils.Database(str(user_path / "logs.db"))["responses"].count == 1
 
 
+def test_logs_db_connection_is_reused(mock_model, user_path):
+    runner = CliRunner()
+    for i in range(2):
+        mock_model.enqueue(["response {}".format(i)])
+        result = runner.invoke(cli, ["prompt", "-m", "mock", "hello"])
+        assert result.exit_code == 0
+    db = llm.cli._get_logs_db()
+    assert db is llm.cli._get_logs_db()
+    assert db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert db["responses"].count == 2
+
+
+def test_logs_db_reopened_after_delete(user_path):
+    db = llm.cli._get_logs_db()
+    (user_path / "logs.db").remove()
+    new_db = llm.cli._get_logs_db()
+    assert new_db is not db
+    assert (user_path / "logs.db").exists()
+    with pytest.raises(sqlite3.ProgrammingError):
+        db.execute("select 1")
+
+
 @mock.patch.dict(os.environ, {"OPENAI_API_KEY": "X"})
 @pytest.mark.parametrize("use_stdin", (True, False, "split"))
 @pytest.mark.parametrize(
@@ -721,3 +766,50 @@ def test_sync_on_done(mock_model):
     assert len(caught) == 0
     str(response)
     assert len(caught) == 1
+
+
+def test_stream_writer_batches_flushes(monkeypatch):
+    writes = []
+    flushes = []
+
+    class FakeStdout:
+        def write(self, s):
+            writes.append(s)
+
+        def flush(self):
+            flushes.append(len(writes))
+
+    monkeypatch.setattr(sys, "stdout", FakeStdout())
+    writer = llm.cli._StreamWriter(flush_size=10, flush_interval=60)
+    for chunk in ("abc", "def", "ghij", "k"):
+        writer.write(chunk)
+    # Only the first 10 characters have been written so far
+    assert writes == ["abcdefghij"]
+    writer.flush()
+    assert writes == ["abcdefghij", "k"]
+    assert flushes == [1, 2]
+
+
+def test_stream_writer_flushes_partial_output_on_error(mock_model, monkeypatch):
+    def execute(prompt, stream, response, conversation):
+        yield "partial answer before "
+        yield "the "
+        raise RuntimeError("Stream broke")
+
+    monkeypatch.setattr(mock_model, "execute", execute)
+    monkeypatch.setattr(mock_model, "can_stream", True)
+    runner = CliRunner()
+    result = runner.invoke(cli, ["prompt", "-m", "mock", "hello"])
+    assert isinstance(result.exception, RuntimeError)
+    assert result.output == "partial answer before the "
+
+
+def test_response_text_joined_once(mock_model):
+    mock_model.enqueue(["one ", "two ", "three"])
+    response = mock_model.prompt("hello")
+    assert list(response) == ["one ", "two ", "three"]
+    text = response.text()
+    assert text == "one two three"
+    assert response.text() is text
+    # Iterating a completed response still replays the original chunks
+    assert list(response) == ["one ", "two ", "three"]
@@ -42,6 +42,8 @@ def test_migrate_blank():
     ):
         assert expected_fk in foreign_keys
 
+    assert ["conversation_id"] in [index.columns for index in db["responses"].indexes]
+
 
 @pytest.mark.parametrize("has_record", [True, False])
 def test_migrate_from_original_schema(has_record):
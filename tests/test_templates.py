@@ -1,5 +1,6 @@
 from click.testing import CliRunner
 import json
+import llm
 from llm import Template
 from llm.cli import cli
 import os
@@ -42,6 +43,15 @@ def test_template_evaluate(
         assert system == expected_system
 
 
+def test_template_interpolate_repeated():
+    # Parsed templates are cached, so re-use must not leak between calls
+    assert Template.interpolate("Hi $name", {"name": "one"}) == "Hi one"
+    assert Template.interpolate("Hi $name", {"name": "two"}) == "Hi two"
+    with pytest.raises(Template.MissingVariables) as ex:
+        Template.interpolate("Hi $name", {})
+    assert ex.value.args[0] == "Missing variables: name"
+
+
 def test_templates_list_no_templates_found():
     runner = CliRunner()
     result = runner.invoke(cli, ["templates", "list"])
@@ -76,6 +86,60 @@ def test_templates_list(templates_path, args):
     )
 
 
+def test_templates_json_cache(templates_path):
+    path = templates_path / "cached.yaml"
+    path.write_text("system: one\nprompt: $input", "utf-8")
+    runner = CliRunner()
+    result = runner.invoke(cli, ["templates", "show", "cached"])
+    assert result.exit_code == 0
+    assert "system: one" in result.output
+    cache = json.loads((templates_path / "cached.yaml.json").read_text("utf-8"))
+    assert cache["template"] == {"system": "one", "prompt": "$input"}
+    # Editing the YAML should invalidate the cache
+    path.write_text("system: a different one\nprompt: $input", "utf-8")
+    result = runner.invoke(cli, ["templates", "show", "cached"])
+    assert result.exit_code == 0
+    assert "system: a different one" in result.output
+    # Sidecar files should not show up as templates
+    result = runner.invoke(cli, ["templates", "list"])
+    assert result.output == "cached : system: a different one prompt: $input\n"
+
+
+def test_templates_json_cache_detects_same_size_edit(templates_path):
+    path = templates_path / "cached.yaml"
+    path.write_text("prompt: aaa", "utf-8")
+    stat = os.stat(str(path))
+    runner = CliRunner()
+    result = runner.invoke(cli, ["templates", "show", "cached"])
+    assert "prompt: aaa" in result.output
+    # Same size and same mtime, as after an edit within one timestamp tick
+    path.write_text("prompt: bbb", "utf-8")
+    os.utime(str(path), ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    # Simulate a new process, which only has the sidecar file to go on
+    llm.cli._parse_template_file.cache_clear()
+    result = runner.invoke(cli, ["templates", "show", "cached"])
+    assert "prompt: bbb" in result.output
+
+
+def test_templates_json_cache_skips_non_json_yaml(templates_path):
+    # YAML allows integer keys, which JSON would turn into strings
+    (templates_path / "t.yaml").write_text("prompt: hi\ndefaults:\n  1: x", "utf-8")
+    runner = CliRunner()
+    for _ in range(2):
+        result = runner.invoke(cli, ["templates", "show", "t"])
+        assert result.exit_code == 1
+        assert "A validation error occurred" in result.output
+    assert not (templates_path / "t.yaml.json").exists()
+
+
+def test_templates_invalid_yaml(templates_path):
+    (templates_path / "bad.yaml").write_text("prompt: [unclosed", "utf-8")
+    runner = CliRunner()
+    result = runner.invoke(cli, ["templates", "show", "bad"])
+    assert result.exit_code == 1
+    assert "Invalid YAML" in result.output
+
+
 @pytest.mark.parametrize(
     "args,expected_prompt,expected_error",
     (
@@ -1,5 +1,11 @@
 import pytest
-from llm.utils import simplify_usage_dict, extract_fenced_code_block
+from llm.utils import (
+    dicts_to_table_string,
+    ensure_dir,
+    remove_dict_none_values,
+    simplify_usage_dict,
+    extract_fenced_code_block,
+)
 
 
 @pytest.mark.parametrize(
@@ -101,3 +107,60 @@ def test_simplify_usage_dict(input_data, expected_output):
 def test_extract_fenced_code_block(input, last, expected):
     actual = extract_fenced_code_block(input, last=last)
     assert actual == expected
+
+
+@pytest.mark.parametrize(
+    "dicts,expected",
+    [
+        ([], ["id    owned_by"]),
+        (
+            [
+                {"id": "gpt-4", "owned_by": "openai"},
+                {"id": "a-much-longer-id"},
+                {"id": None, "owned_by": 12},
+            ],
+            [
+                "id                  owned_by",
+                "gpt-4               openai  ",
+                "a-much-longer-id            ",
+                "None                12      ",
+            ],
+        ),
+    ],
+)
+def test_dicts_to_table_string(dicts, expected):
+    assert dicts_to_table_string(["id", "owned_by"], dicts) == expected
+
+
+
+@pytest.mark.parametrize(
+    "input_data,expected_output",
+    [
+        ({"a": 1, "b": None}, {"a": 1}),
+        ({"a": {"b": None}, "c": {}}, {}),
+        ({"a": [{"b": None, "c": 1}, None, 2]}, {"a": [{"c": 1}, None, 2]}),
+        ({"a": {"b": {"c": None, "d": "x"}}}, {"a": {"b": {"d": "x"}}}),
+        ("not a dict", "not a dict"),
+    ],
+)
+def test_remove_dict_none_values(input_data, expected_output):
+    assert remove_dict_none_values(input_data) == expected_output
+
+
+def test_remove_dict_none_values_returns_unchanged_input():
+    data = {"a": 1, "b": {"c": [{"d": 2}, 3]}, "e": [{}]}
+    assert remove_dict_none_values(data) is data
+    # Only subtrees that contained a None are rebuilt
+    data = {"a": {"b": 1}, "c": {"d": None, "e": 2}}
+    result = remove_dict_none_values(data)
+    assert result == {"a": {"b": 1}, "c": {"e": 2}}
+    assert result["a"] is data["a"]
+
+
+def test_ensure_dir_recreates_deleted_directory(tmp_path):
+    path = tmp_path / "a" / "b"
+    ensure_dir(path)
+    assert path.is_dir()
+    path.rmdir()
+    ensure_dir(path)
+    assert path.is_dir()